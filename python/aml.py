@@ -1,5 +1,14 @@
+import atexit
+import functools
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import automol
 import networkx as nx
+import numpy as np
 from rdkit.Chem.rdchem import Mol
 
 from .rdk import mol_to_smiles
@@ -17,20 +26,87 @@ def canonical_enantiomer(graph: CT.AutomolGraph):
     return amchi, graph
 
 
+_EXECUTOR: ProcessPoolExecutor | None = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    """Returns the module-level worker pool, creating it on first use."""
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        # One worker per core; spawned workers avoid forking a threaded parent (e.g. a Jupyter kernel)
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        atexit.register(_EXECUTOR.shutdown)
+
+    return _EXECUTOR
+
+
+_STATIONARY_CACHE: OrderedDict[CT.SMILES, tuple[str, str]] = OrderedDict()
+_STATIONARY_CACHE_SIZE = 4096
+
+
+def _cache_stationary(smiles: CT.SMILES, bundle: tuple[str, str]):
+    """Stores a stationary bundle in the process-wide cache, evicting the least recently used."""
+    _STATIONARY_CACHE[smiles] = bundle
+
+    if len(_STATIONARY_CACHE) > _STATIONARY_CACHE_SIZE:
+        _STATIONARY_CACHE.popitem(last=False)
+
+
+def _stationary_bundle(smiles: CT.SMILES) -> tuple[str, str]:
+    """Returns canonical amchi and xyz string of a stationary species."""
+    amchi, graph = canonical_enantiomer(stationary_graph(smiles))
+
+    geom = automol.graph.geometry(graph)
+    xyz = automol.geom.xyz_string(geom)
+
+    return amchi, xyz
+
+
+def _stationary_bundles(smiles_list: list[CT.SMILES]) -> dict[CT.SMILES, tuple[str, str]]:
+    """Returns stationary bundles by SMILES, sending every cache miss to the pool in one batch."""
+    global _EXECUTOR
+
+    bundles = {}
+    misses = []
+    for smiles in dict.fromkeys(smiles_list):
+        if smiles in _STATIONARY_CACHE:
+            _STATIONARY_CACHE.move_to_end(smiles)
+            bundles[smiles] = _STATIONARY_CACHE[smiles]
+        else:
+            misses.append(smiles)
+
+    # A crashed worker (segfault, OOM kill) breaks the whole pool, so replace it and retry once
+    for attempt in range(2):
+        try:
+            results = list(_executor().map(_stationary_bundle, misses))
+            break
+        except BrokenProcessPool:
+            _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = None
+            if attempt:
+                raise
+
+    for smiles, bundle in zip(misses, results):
+        _cache_stationary(smiles, bundle)
+        bundles[smiles] = bundle
+
+    return bundles
+
+
 def process_rdkit_reaction(reactants: Mol | CT.RDMols, product_sets: list[CT.RDMols]):
     """Processes RDKit reactions through the AutoMol package."""
     enumerated_graph = nx.DiGraph()
 
     # == Bulky definitions ==
-    def _add_stationary(molecules, role) -> list:
+    def _add_stationary(rdkit_smiles, role) -> list:
         amchis_list, smiles_list = [], []
 
-        for molecule in molecules:
-            (smiles,) = mol_to_smiles(molecule)
-            amchi, graph = canonical_enantiomer(stationary_graph(smiles))
-
-            geom = automol.graph.geometry(graph)
-            xyz = automol.geom.xyz_string(geom)
+        for smiles in rdkit_smiles:
+            amchi, xyz = bundles[smiles]
             enumerated_graph.add_node(amchi, smiles=smiles, xyz=xyz, role=role)
 
             smiles_list.append(automol.amchi.smiles(amchi))
@@ -53,22 +129,37 @@ def process_rdkit_reaction(reactants: Mol | CT.RDMols, product_sets: list[CT.RDM
             formed = automol.graph.ts.forming_bond_keys(graph)
             broken = automol.graph.ts.breaking_bond_keys(graph)
 
-            dmat_angstrom = automol.geom.distance_matrix(geom) * 0.529177
+            # Index forming bonds by atom so each breaking bond only visits its neighbours; an
+            # atom may sit in several forming bonds, so keep every bond with its position
+            formed_by_atom = {}
+            for position, bond in enumerate(formed):
+                for atom in bond:
+                    formed_by_atom.setdefault(atom, []).append((position, bond))
 
             for broken_bond in broken:
                 a, b = broken_bond
-                if len(formed) > 0:
-                    for formed_bond in formed:
-                        shared = broken_bond & formed_bond
-                        if len(shared) == 1:
-                            c = next(iter(formed_bond - shared))
-                            dist = dmat_angstrom[b, c]
-                            active_atoms = f"{b} {c}"
-                            scan = f"scan B {active_atoms} = {dist:.3f}, 0.7, 100"
-                            
+                if formed_by_atom:
+                    # The last partner in forming-bond order wins, as in a full scan of formed
+                    partners = [
+                        (position, formed_bond)
+                        for atom in broken_bond
+                        for position, formed_bond in formed_by_atom.get(atom, ())
+                        if len(broken_bond & formed_bond) == 1
+                    ]
+                    if partners:
+                        _, formed_bond = max(partners, key=lambda partner: partner[0])
+                        c = next(iter(formed_bond - broken_bond))
+                        active_pair, target = (b, c), 0.7
+
                 else:
-                    active_atoms = f"{a} {b}"
-                    scan = f"scan B {active_atoms} = {dmat_angstrom[a, b]:.3f}, 2.0, 100"
+                    active_pair, target = (a, b), 2.0
+
+            # Only the active bond distance is needed, so skip the full distance matrix
+            coords = automol.geom.coordinates(geom, idxs=active_pair, angstrom=True)
+            dist = np.linalg.norm(np.subtract(*coords))
+
+            active_atoms = "{} {}".format(*active_pair)
+            scan = f"scan B {active_atoms} = {dist:.3f}, {target}, 100"
 
             return scan, active_atoms
 
@@ -87,9 +178,17 @@ def process_rdkit_reaction(reactants: Mol | CT.RDMols, product_sets: list[CT.RDM
         return amchi
 
     # == Workflow ==
-    (reactant_amchis, reactant_smiles) = _add_stationary(reactants, "reactant")
+    # Resolve reactants and every product set up front so all cache misses share one pool
+    # batch; SMILES is the cache key, so a miss costs one parse in a worker and a hit none
+    rdkit_reactants = mol_to_smiles(reactants)
+    rdkit_product_sets = [mol_to_smiles(products) for products in product_sets]
+    bundles = _stationary_bundles(
+        [*rdkit_reactants, *(smiles for products in rdkit_product_sets for smiles in products)]
+    )
+
+    (reactant_amchis, reactant_smiles) = _add_stationary(rdkit_reactants, "reactant")
 
-    for products in product_sets:
+    for products in rdkit_product_sets:
         (product_amchis, product_smiles) = _add_stationary(products, "product")
 
         for reaction in reaction_graphs(tuple(reactant_smiles), tuple(product_smiles)):
@@ -118,6 +217,7 @@ def reaction_graphs(
     return automol.reac.from_smiles(reactants, products)
 
 
+@functools.lru_cache(maxsize=4096)
 def stationary_graph(
     smiles: str = None, amchi: str = None, canonical: str = True
 ) -> CT.AutomolGraph:
@@ -1,4 +1,6 @@
+import json
 import os
+import socket
 import subprocess
 import time
 from math import ceil
@@ -29,13 +31,17 @@ def start_server():
             stale.unlink()
 
     HQ_SERVER_DIR.mkdir(parents=True, exist_ok=True)
-    log_file = HQ_LOG.open("w")
-
-    subprocess.Popen(
-        ["hq", "server", "start", "--server-dir", str(HQ_SERVER_DIR)],
-        stdout=log_file,
-        stderr=subprocess.STDOUT,
-    )
+    log_fd = os.open(HQ_LOG, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    # The child keeps its own copy of the descriptor, so ours can close right away
+    try:
+        subprocess.Popen(
+            ["hq", "server", "start", "--server-dir", str(HQ_SERVER_DIR)],
+            stdout=log_fd,
+            stderr=subprocess.STDOUT,
+        )
+    finally:
+        os.close(log_fd)
 
 
 def submit_tasks_orca(task_graph: CT.NetworkXGraph):
@@ -66,52 +72,92 @@ def submit_tasks_orca(task_graph: CT.NetworkXGraph):
             f"--gres=lscratch:{pars.lscratch_size}",
         ]
 
+    # Collect unique allocations up front so they can be requested together
+    allocations = {}
+    for _, d in task_graph.nodes(data=True):
+        allocation = _slurm_alloc(d["pars"])
+        allocations.setdefault(tuple(allocation), allocation)
+
     start_server()
     wait_for_server()
 
-    all_tasks = {}
-    allocation_requests = set()
+    # Every allocation request is reaped, even if building the job raises
+    allocation_processes = []
+    try:
+        for allocation in allocations.values():
+            allocation_processes.append(subprocess.Popen(allocation))
 
-    job = Job()
-    client = Client(HQ_SERVER_DIR)
+        all_tasks = {}
 
-    for n, d in task_graph.nodes(data=True):
-        cwd = Path(n).parent
-        pars = d["pars"]
+        job = Job()
+        client = Client(HQ_SERVER_DIR)
 
-        dependent_tasks = [all_tasks[dep] for dep in list(task_graph.predecessors(n))]
+        for n, d in task_graph.nodes(data=True):
+            cwd = Path(n).parent
+            pars = d["pars"]
 
-        allocation = _slurm_alloc(pars)
-        if "".join(allocation) not in allocation_requests:
-            subprocess.run(allocation, check=True)
-            allocation_requests.add("".join(allocation))
+            dependent_tasks = [all_tasks[dep] for dep in task_graph.predecessors(n)]
 
-        mem_mib = ceil(pars.max_memory / 1.049)
+            mem_mib = ceil(pars.max_memory / 1.049)
 
-        task = job.function(
-            fn=_bash(pars.name_out),
-            cwd=cwd,
-            deps=dependent_tasks,
-            resources=ResourceRequest(cpus=pars.processors, resources={"mem": mem_mib}),
-            stderr=cwd / "stderr.log",
-            stdout=cwd / "stdout.log",
-        )
+            task = job.function(
+                fn=_bash(pars.name_out),
+                cwd=cwd,
+                deps=dependent_tasks,
+                resources=ResourceRequest(cpus=pars.processors, resources={"mem": mem_mib}),
+                stderr=cwd / "stderr.log",
+                stdout=cwd / "stdout.log",
+            )
+
+            all_tasks[n] = task
 
-        all_tasks[n] = task
+    finally:
+        for process in allocation_processes:
+            process.wait()
+
+    failed = [process for process in allocation_processes if process.returncode != 0]
+    if failed:
+        raise RuntimeError(
+            "HQ allocation requests failed:\n"
+            + "\n".join(
+                f"{' '.join(map(str, process.args))} (exit {process.returncode})"
+                for process in failed
+            )
+        )
 
     submitted = client.submit(job)
     client.wait_for_jobs([submitted])
 
 
-def wait_for_server():
-    """Waits until HQ server is responsive."""
-    for _ in range(10):
-        try:
-            subprocess.run(
-                ["hq", "alloc", "list"], check=True, stdout=subprocess.DEVNULL
-            )
-            return
-        except subprocess.CalledProcessError:
-            time.sleep(2)
+def wait_for_server(timeout: float = 20.0):
+    """Waits until HQ server accepts client connections."""
+    delay = 0.05
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        address = _client_address()
+        if address is not None:
+            try:
+                with socket.create_connection(address, timeout=1.0):
+                    return
+            except OSError:
+                pass
+
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
 
     raise RuntimeError("HQ server not responding after multiple attempts.")
+
+
+def _client_address() -> tuple[str, int] | None:
+    """Returns client host and port from the HQ access file, if it has been written."""
+    # Resolve the access file the same way the hq CLI and Client(HQ_SERVER_DIR) do
+    current = HQ_SERVER_DIR / "hq-current"
+    access_file = (current if current.is_symlink() else HQ_SERVER_DIR) / "access.json"
+
+    try:
+        client = json.loads(access_file.read_text())["client"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return client["host"], client["port"]
@@ -10,7 +10,7 @@ def graph_matcher(molecules_1: CT.RDMols, molecules_2: CT.RDMols):
     graph_2 = networkx_molecular_graph(molecules_2)
 
     def _node_match(node_1, node_2) -> bool:
-        return node_1["symbol"] == node_2["symbol"]
+        return node_1["atomic_number"] == node_2["atomic_number"]
 
     return GraphMatcher(graph_1, graph_2, node_match=_node_match)
 
@@ -20,13 +20,15 @@ def networkx_molecular_graph(mols: CT.RDMols) -> CT.NetworkXGraph:
     graph = nx.Graph()
 
     for idx, mol in enumerate(mols):
-        for atom in mol.GetAtoms():
-            key = (idx, atom.GetIdx())
-            graph.add_node(key, symbol=atom.GetSymbol())
-
-        for bond in mol.GetBonds():
-            key_1 = (idx, bond.GetBeginAtomIdx())
-            key_2 = (idx, bond.GetEndAtomIdx())
-            graph.add_edge(key_1, key_2)
+        atoms = mol.GetAtoms()
+        graph.add_nodes_from(
+            ((idx, atom.GetIdx()), {"atomic_number": atom.GetAtomicNum()})
+            for atom in atoms
+        )
+
+        graph.add_edges_from(
+            ((idx, bond.GetBeginAtomIdx()), (idx, bond.GetEndAtomIdx()))
+            for bond in mol.GetBonds()
+        )
 
     return graph
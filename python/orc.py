@@ -2,8 +2,8 @@ from dataclasses import dataclass
 from pathlib import Path
 
 import mmap
+import os
 from math import floor
-import copy
 
 @dataclass
 class ORCA_Parameters:
@@ -34,8 +34,6 @@ def orca_inputs(
     data_dir: str | Path,
 ):
     """Writes .inp and .sh files for ORCA calculation."""
-    pars = copy.deepcopy(pars)
-
     inp_text = f"""%PAL NPROCS {pars.processors} END
 %MaxCore {floor(pars.max_memory * 0.8)}
 %base "{pars.name_out}"
@@ -73,32 +71,76 @@ $(which orca) {pars.name_out}.inp > "$SUBMIT_DIR/{pars.name_out}.log"
         data_dir = Path(data_dir)
 
     directory = data_dir / amchi
-    (directory / f"{pars.name_out}.inp").write_text(inp_text)
-    (directory / f"{pars.name_out}.sh").write_text(sh_header + sh_body)
+    write_bytes(directory / f"{pars.name_out}.inp", inp_text.encode())
+    write_bytes(directory / f"{pars.name_out}.sh", sh_header.encode(), sh_body.encode())
 
     return directory / f"{pars.name_out}.sh"
 
+def write_bytes(path: Path, *chunks: bytes):
+    """Writes byte chunks to a file with writev on a raw file descriptor."""
+    remaining = [memoryview(chunk) for chunk in chunks if chunk]
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # writev may write short (e.g. disk full or quota), so resume until every byte is out
+        while remaining:
+            written = os.writev(fd, remaining)
+            if written == 0:
+                raise OSError(f"Short write to {path}")
+
+            while remaining and written >= len(remaining[0]):
+                written -= len(remaining.pop(0))
+
+            if written:
+                remaining[0] = remaining[0][written:]
+    finally:
+        os.close(fd)
+
 def parse_log_file(log_file: str | Path, search_string: str):
     """Extracts single point energy from log file."""
+    (line,) = parse_log_lines(log_file, (search_string,))
+
+    return line
+
+def parse_log_lines(log_file: str | Path, search_strings: tuple[str | None, ...]):
+    """Extracts the line matching each search string from a single pass over the log file."""
     log_file = Path(log_file)
-    search_bytes = search_string.encode()
 
+    lines = []
+    with open(log_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for search_string in search_strings:
+            if search_string is None:
+                lines.append(None)
+                continue
+
+            matches = _find_lines(mm, search_string.encode())
+            if len(matches) == 1:
+                lines.append(matches[0])
+
+            else:
+                print(f"""Log file contains search string {len(matches)} times.
+                Will not log results for this search string.
+
+                Search string: {search_string}
+                Log file path: {log_file}
+                """)
+
+                lines.append(None)
+
+    return tuple(lines)
+
+def _find_lines(mm: mmap.mmap, search_bytes: bytes) -> list[str]:
+    """Returns every line of a mapped file that contains the search bytes."""
     matches = []
-    with open(log_file, "r+b") as f:
-        mm = mmap.mmap(f.fileno(), 0)
-        for line_bytes in iter(mm.readline, b""):
-            if search_bytes in line_bytes:
-                matches.append(line_bytes.decode("utf-8").strip())
-
-    if len(matches) == 1:
-        return matches[0]
-    
-    else:
-        print(f"""Log file contains search string {len(matches)} times.
-        Will not log results for this search string.
-
-        Search string: {search_string}
-        Log file path: {log_file}
-        """)
-        
-        return None
\ No newline at end of file
+
+    # Let mmap.find scan in C and only slice out the lines around each hit; one find pass
+    # per needle measured several times faster than a single regex alternation pass
+    pos = 0
+    while (hit := mm.find(search_bytes, pos)) != -1:
+        line_start = mm.rfind(b"\n", 0, hit) + 1
+        line_end = mm.find(b"\n", hit)
+        line_end = len(mm) if line_end == -1 else line_end
+
+        matches.append(mm[line_start:line_end].decode("utf-8").strip())
+        pos = line_end + 1
+
+    return matches
@@ -1,3 +1,4 @@
+import functools
 import re
 from collections.abc import Sequence
 
@@ -9,6 +10,8 @@ from . import ntx
 from .ref import CustomTypes as CT
 from .ref import ValenceIdentities as VI
 
+ATOM_MAP_RE = re.compile(r"\[([^\]:]+):(\d+)\]")
+
 
 def isomorphic(molecules_1: CT.RDMols, molecules_2: CT.RDMols) -> bool:
     """Determines whether two sets of molecules are isomorphic to each other."""
@@ -41,6 +44,7 @@ def mol_to_smiles(
     for molecule in molecules:
         if ignore_map_numbers:
             molecule = Chem.RemoveHs(molecule)
+            # ignoreAtomMapNumbers only affects ranking; the written SMILES keeps map numbers
             for atom in molecule.GetAtoms():
                 atom.SetAtomMapNum(0)
 
@@ -62,23 +66,27 @@ def mol_to_inchi(molecules: Mol | CT.RDMols) -> CT.InChI_Set:
     return tuple(inchis)
 
 
-def radicals_from_smarts(reaction_smarts: str) -> set[int]:
+@functools.lru_cache(maxsize=64)
+def radicals_from_smarts(reaction_smarts: str) -> frozenset[int]:
     """Infers radical map numbers from reaction smarts."""
-    radicals = set()
+    return frozenset(
+        int(map_number)
+        for valence_identity, map_number in ATOM_MAP_RE.findall(reaction_smarts)
+        if valence_identity in VI.Radical_Tokens
+    )
 
-    atom_re = re.compile(r"\[([^\]:]+):(\d+)\]")
-    for valence_identity, map_number in atom_re.findall(reaction_smarts):
-        if valence_identity in VI.Radical_Tokens:
-            radicals.add(int(map_number))
 
-    return radicals
+@functools.lru_cache(maxsize=64)
+def _compile_reaction(reaction_smarts: str) -> rdChemReactions.ChemicalReaction:
+    """Returns a compiled RDKit reaction, cached by SMARTS string."""
+    return rdChemReactions.ReactionFromSmarts(reaction_smarts)
 
 
 def run_reaction(
     reactants: CT.RDMols, reaction_smarts: str, isomorphs: bool = False
 ) -> list[CT.RDMols]:
     """Returns Mol products given reactant Mol(s) and reaction SMARTS."""
-    rxn = rdChemReactions.ReactionFromSmarts(reaction_smarts)
+    rxn = _compile_reaction(reaction_smarts)
 
     _, rhs_smarts = reaction_smarts.split(">>")
     rhs_radicals = radicals_from_smarts(rhs_smarts)
@@ -103,15 +111,31 @@ def run_reaction(
     return product_sets
 
 
+def _isomorph_key(molecules: CT.RDMols) -> CT.SMILES_Set:
+    """Returns sorted canonical SMILES of molecule(s), keeping explicit hydrogens."""
+    molecules = (molecules,) if isinstance(molecules, Mol) else molecules
+
+    smiles = []
+    for molecule in molecules:
+        # Hydrogen positions distinguish products before radicals are assigned;
+        # InChIKeys normalize mobile hydrogens and would merge those products
+        molecule = Mol(molecule)
+        for atom in molecule.GetAtoms():
+            atom.SetAtomMapNum(0)
+
+        smiles.append(Chem.MolToSmiles(molecule))
+
+    return tuple(sorted(smiles))
+
+
 def unique_molecules(molecules: Sequence[CT.RDMols]) -> CT.RDMols:
     "Identifies unique molecules from a sequence."
-    unique_set = []
+    unique_set = {}
 
     for molecule in molecules:
-        if not any(isomorphic(molecule, m) for m in unique_set):
-            unique_set.append(molecule)
+        unique_set.setdefault(_isomorph_key(molecule), molecule)
 
-    return unique_set
+    return list(unique_set.values())
 
 
 class Reaction_Templates:
@@ -33,4 +33,4 @@ class ValenceIdentities:
     Cu = "CX3"
     Ou = "OX1"
 
-    Radical_Tokens = [Ar, Cr, Or]
+    Radical_Tokens = frozenset((Ar, Cr, Or))
@@ -1,97 +1,254 @@
 import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 from .ref import CustomTypes as CT
-from .orc import parse_log_file
+from .orc import parse_log_file, parse_log_lines, write_bytes
+
+_SQL_STATIONARY_ROWS = "SELECT id, amchi FROM stationary"
+_SQL_TRANSITION_ROWS = "SELECT id, amchi FROM transition"
+
+_SQL_STATIONARY_ENERGIES = """
+SELECT stationary_id, single_point, zero_point, total_energy
+FROM energies
+WHERE stationary_id IS NOT NULL
+"""
+
+_SQL_TRANSITION_ENERGIES = """
+SELECT transition_id, single_point, zero_point, total_energy, imaginary_frequency
+FROM energies
+WHERE transition_id IS NOT NULL
+"""
+
+_SQL_UPSERT_STATIONARY_ENERGIES = """
+INSERT INTO energies (stationary_id, single_point, zero_point, total_energy)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (stationary_id) DO UPDATE SET
+    single_point = COALESCE(excluded.single_point, energies.single_point),
+    zero_point = COALESCE(excluded.zero_point, energies.zero_point),
+    total_energy = COALESCE(excluded.total_energy, energies.total_energy)
+"""
+
+_SQL_UPSERT_TRANSITION_ENERGIES = """
+INSERT INTO energies (transition_id, single_point, zero_point, total_energy, imaginary_frequency)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (transition_id) DO UPDATE SET
+    single_point = COALESCE(excluded.single_point, energies.single_point),
+    zero_point = COALESCE(excluded.zero_point, energies.zero_point),
+    total_energy = COALESCE(excluded.total_energy, energies.total_energy),
+    imaginary_frequency = COALESCE(excluded.imaginary_frequency, energies.imaginary_frequency)
+"""
 
 
 def amchi_in_database(amchi: str, connection: sqlite3.Connection):
     """Returns True if amchi string is present in stationaries table of database."""
     cursor = connection.cursor()
-    cursor.execute("SELECT id FROM stationary WHERE amchi = ?", (amchi,))
-    matches = cursor.fetchall()
-    return matches is None
+    cursor.execute("SELECT 1 FROM stationary WHERE amchi = ? LIMIT 1", (amchi,))
+    return cursor.fetchone() is not None
 
 
 def connect(data_directory: str | Path) -> sqlite3.Connection:
     """Connects to a sql database."""
-    Path(data_directory).mkdir(exist_ok=True, parents=True)
-    return sqlite3.connect(data_directory / "data.db")
+    data_directory = Path(data_directory)
+    data_directory.mkdir(exist_ok=True, parents=True)
+    connection = sqlite3.connect(
+        data_directory / "data.db", isolation_level=None, cached_statements=256
+    )
+
+    # WAL with NORMAL sync only fsyncs at checkpoints instead of on every commit
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute("PRAGMA cache_size=-65536")
+    connection.execute("PRAGMA busy_timeout=5000")
+
+    return connection
+
+
+def compress_xyz(xyz: str) -> bytes:
+    """Compresses an xyz string for storage in a BLOB column."""
+    return zlib.compress(xyz.encode(), 1)
+
+
+def decompress_xyz(value: bytes | str) -> str:
+    """Returns a stored xyz string, passing through rows written before compression."""
+    return zlib.decompress(value).decode() if isinstance(value, bytes) else value
+
+
+def batch_insert(
+    cursor: sqlite3.Cursor,
+    table: str,
+    columns: tuple[str, ...],
+    rows: list[tuple],
+    on_conflict: str = "",
+    returning: str = "",
+    max_params: int = 999,
+) -> list[tuple]:
+    """Inserts rows with multi-row VALUES statements sized to the SQLite parameter limit."""
+    chunk_size = max(max_params // len(columns), 1)
+    placeholder = "(" + ", ".join("?" * len(columns)) + ")"
+    returning = f"RETURNING {returning}" if returning else ""
+
+    returned = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        values = ", ".join([placeholder] * len(chunk))
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} {on_conflict} {returning}",
+            [value for row in chunk for value in row],
+        )
+        returned.extend(cursor.fetchall())
+
+    return returned
+
+
+def existing_ids(
+    cursor: sqlite3.Cursor, table: str, amchis: list[str], max_params: int = 999
+) -> dict[str, int]:
+    """Returns the ids of amchi strings already present in a table, probing with IN lists."""
+    ids = {}
+
+    for start in range(0, len(amchis), max_params):
+        chunk = amchis[start : start + max_params]
+        cursor.execute(
+            f"SELECT amchi, id FROM {table} WHERE amchi IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
+        ids.update(cursor.fetchall())
+
+    return ids
+
+
+def delete_amchis(
+    cursor: sqlite3.Cursor, table: str, amchis: list[str], max_params: int = 999
+):
+    """Deletes the rows of amchi strings from a table, matching with IN lists."""
+    for start in range(0, len(amchis), max_params):
+        chunk = amchis[start : start + max_params]
+        cursor.execute(
+            f"DELETE FROM {table} WHERE amchi IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
 
 
 def enumerated_graph_into_database(
-    enumerated_graph: CT.NetworkXGraph, data_directory: str | Path, connection: sqlite3.Connection
+    enumerated_graph: CT.NetworkXGraph,
+    data_directory: str | Path | None,
+    connection: sqlite3.Connection,
 ):
-    """Fills sqlite3 database with enumerated reaction graph."""
-    cursor = connection.cursor()
-
-    to_submit = {}
-    amchi_to_ids = {}
+    """Fills sqlite3 database with enumerated reaction graph, writing guess geometries unless data_directory is None."""
+    stationaries, transitions = [], []
     for amchi, data in enumerated_graph.nodes(data=True):
-        if data.get("role") not in ("reactant", "product"):
-            continue
-
-        smiles = data.get("smiles")
-        xyz = data.get("xyz")
-
-        cursor.execute("SELECT id FROM stationary WHERE amchi = ?", (amchi,))
-        result = cursor.fetchone()
-
-        if not result:
-            cursor.execute(
-                """
-                INSERT INTO stationary (amchi, smiles, xyz)
-                VALUES (?, ?, ?)
-                """,
-                (amchi, smiles, xyz),
-            )
-            amchi_to_ids[amchi] = cursor.lastrowid
+        role = data.get("role")
+        if role in ("reactant", "product"):
+            stationaries.append((amchi, data))
+        elif role == "transition":
+            transitions.append((amchi, data))
 
+    to_submit = {}
+    pending_files = []
+    with transaction(connection) as cursor:
+        # Probe only this graph's amchis instead of reading whole tables
+        amchi_to_ids = existing_ids(cursor, "stationary", [amchi for amchi, _ in stationaries])
+        transition_amchis = existing_ids(cursor, "transition", [amchi for amchi, _ in transitions]).keys()
+
+        new_stationaries = []
+        for amchi, data in stationaries:
+            if amchi not in amchi_to_ids:
+                xyz = data.get("xyz")
+                new_stationaries.append((amchi, data.get("smiles"), compress_xyz(xyz)))
+                pending_files.append((amchi, xyz))
+
+                to_submit[amchi] = "stationary"
+
+        # RETURNING hands back the new ids without a second lookup
+        new_ids = batch_insert(
+            cursor,
+            "stationary",
+            ("amchi", "smiles", "xyz"),
+            new_stationaries,
+            on_conflict="ON CONFLICT (amchi) DO NOTHING",
+            returning="amchi, id",
+        )
+        amchi_to_ids.update(new_ids)
+
+        new_transitions = []
+        for amchi, data in transitions:
+            if amchi not in transition_amchis:
+                xyz = data.get("xyz")
+                scan = data.get("scan")
+                # Nodes carry a single scan line; joining a str would interleave newlines per character
+                scan_string = scan if isinstance(scan, str) else "\n".join(scan)
+                reactants = data.get("reactants")
+                products = data.get("products")
+
+                r1 = amchi_to_ids[reactants[0]]
+                r2 = amchi_to_ids[reactants[1]] if len(reactants) > 1 else None
+                p1 = amchi_to_ids[products[0]]
+                p2 = amchi_to_ids[products[1]] if len(products) > 1 else None
+
+                new_transitions.append((amchi, r1, r2, p1, p2, compress_xyz(xyz), scan_string))
+                pending_files.append((amchi, xyz))
+
+                to_submit[amchi] = "transition"
+
+        batch_insert(
+            cursor,
+            "transition",
+            ("amchi", "reactant_1", "reactant_2", "product_1", "product_2", "xyz", "scan"),
+            new_transitions,
+            on_conflict="ON CONFLICT (amchi) DO NOTHING",
+        )
+
+    if data_directory is None:
+        return to_submit
+
+    # Filesystem work waits until after COMMIT so the write lock is not held during it
+    data_directory = Path(data_directory)
+    try:
+        # AMChI strings contain "/", so species directories share intermediate layers like
+        # AMChI=1/<formula>; remember those so siblings skip the parent traversal
+        created_directories = set()
+        for amchi, xyz in pending_files:
             directory = data_directory / amchi
-            directory.mkdir(parents=True, exist_ok=True)
-            (directory / "guess.xyz").write_text(xyz + "\n")
-
-            to_submit[amchi] = "stationary"
-
-        else:
-            amchi_to_ids[amchi] = result[0]
-
-    for amchi, data in enumerated_graph.nodes(data=True):
-        if data.get("role") not in ("transition"):
-            continue
-
-        cursor.execute("SELECT id FROM transition WHERE amchi = ?", (amchi,))
-        result = cursor.fetchone()
-
-        if not result:
-            xyz = data.get("xyz")
-            scan = data.get("scan")
-            scan_string = "\n".join(scan)
-            reactants = data.get("reactants")
-            products = data.get("products")
-
-            r1 = amchi_to_ids[reactants[0]]
-            r2 = amchi_to_ids[reactants[1]] if len(reactants) > 1 else None
-            p1 = amchi_to_ids[products[0]]
-            p2 = amchi_to_ids[products[1]] if len(products) > 1 else None
-
-            cursor.execute(
-                """
-                INSERT INTO transition (amchi, reactant_1, reactant_2, product_1, product_2, xyz, scan)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (amchi, r1, r2, p1, p2, xyz, scan_string),
+            if directory.parent in created_directories:
+                directory.mkdir(exist_ok=True)
+            else:
+                directory.mkdir(parents=True, exist_ok=True)
+                created_directories.update(directory.parents)
+
+            write_bytes(directory / "guess.xyz", xyz.encode(), b"\n")
+
+    except BaseException:
+        # Drop the rows committed above so a rerun inserts them and writes their files again,
+        # rather than seeing species that have no guess geometry on disk
+        with transaction(connection) as cursor:
+            delete_amchis(
+                cursor, "transition", [a for a, role in to_submit.items() if role == "transition"]
+            )
+            delete_amchis(
+                cursor, "stationary", [a for a, role in to_submit.items() if role == "stationary"]
             )
+        raise
+
+    return to_submit
 
-            directory = data_directory / amchi
-            directory.mkdir(parents=True, exist_ok=True)
-            (directory / "guess.xyz").write_text(xyz + "\n")
 
-            to_submit[amchi] = "transition"
+@contextmanager
+def transaction(connection: sqlite3.Connection):
+    """Yields a cursor inside a single immediate transaction, rolling back on error."""
+    cursor = connection.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
 
-    connection.commit()
+    try:
+        yield cursor
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
 
-    return to_submit
+    cursor.execute("COMMIT")
 
 
 def initialize_database(connection: sqlite3.Connection):
@@ -103,7 +260,7 @@ def initialize_database(connection: sqlite3.Connection):
                         id INTEGER PRIMARY KEY,
                         amchi TEXT NOT NULL,
                         smiles TEXT NOT NULL,
-                        xyz TEXT NOT NULL
+                        xyz BLOB NOT NULL
                 )
                 """)
 
@@ -115,7 +272,7 @@ def initialize_database(connection: sqlite3.Connection):
                         reactant_2 INTEGER REFERENCES stationary(id),
                         product_1 INTEGER REFERENCES stationary(id),
                         product_2 INTEGER REFERENCES stationary(id),
-                        xyz TEXT NOT NULL,
+                        xyz BLOB NOT NULL,
                         scan TEXT NOT NULL
                 )
                 """)
@@ -138,100 +295,87 @@ def initialize_database(connection: sqlite3.Connection):
                 )
                 """)
 
+    # Indexes rather than column constraints, so databases created before them also pick them up
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_stationary_amchi ON stationary(amchi)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transition_amchi ON transition(amchi)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_energies_stationary_id ON energies(stationary_id)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_energies_transition_id ON energies(transition_id)")
+
 def log_energies(connection: sqlite3.Connection, data_dir: str | Path):
     """Logs energies missing from database."""
+    data_dir = Path(data_dir)
 
-    def _parse_energies(amchi: str):
-        spc_line = parse_log_file(data_dir / amchi / "calc.log", "FINAL SINGLE POINT ENERGY")
-        spc_energy = float(spc_line.split(" ")[-1]) * 627.5095 if spc_line else None
+    def _parse_logs(amchi: str, energies: bool = True, imaginary: bool = False):
+        # The zero point energy and imaginary mode both live in freq.log, so scan it once
+        zpv_line, imaginary_line = parse_log_lines(
+            data_dir / amchi / "freq.log",
+            (
+                "Zero point energy" if energies else None,
+                "***imaginary mode***" if imaginary else None,
+            ),
+        )
 
-        zpv_line = parse_log_file(data_dir / amchi / "freq.log", "Zero point energy")
-        zpv_energy = float(zpv_line.split(" ")[-2]) if zpv_line else None
+        parsed_energies = None, None, None
+        if energies:
+            spc_line = parse_log_file(data_dir / amchi / "calc.log", "FINAL SINGLE POINT ENERGY")
+            spc_energy = float(spc_line.split(" ")[-1]) * 627.5095 if spc_line else None
+            zpv_energy = float(zpv_line.split(" ")[-2]) if zpv_line else None
+            tot_energy = None if spc_energy is None or zpv_energy is None else spc_energy + zpv_energy
 
-        tot_energy = None if spc_energy is None or zpv_energy is None else spc_energy + zpv_energy
+            parsed_energies = spc_energy, zpv_energy, tot_energy
 
-        return spc_energy, zpv_energy, tot_energy
+        imag_freq = imaginary_line.strip().split(" ")[3] if imaginary else None
 
-    def _parse_imaginary(amchi: str):
-        imaginary_line = parse_log_file(data_dir / amchi / "freq.log", "***imaginary mode***")
-        
-        return imaginary_line
+        return parsed_energies, imag_freq
+
+    def _energies_missing(row) -> bool:
+        return row is None or None in row[:3]
 
     cursor = connection.cursor()
 
-    cursor.execute("SELECT id, amchi FROM stationary")
-    stationary_rows = cursor.fetchall()
-
-    for stationary_id, amchi in stationary_rows:
-        cursor.execute("""
-        SELECT single_point, zero_point, total_energy
-        FROM energies
-        WHERE stationary_id = ?
-        """, (stationary_id,))
-
-        row = cursor.fetchone()
-        if row is not None:
-            spc_energy, zpv_energy, tot_energy = row
-
-            if spc_energy is None or zpv_energy is None or tot_energy is None:
-                spc_energy, zpv_energy, tot_energy = _parse_energies(amchi)
-
-                cursor.execute("""
-                UPDATE energies
-                SET single_point = ?, zero_point = ?, total_energy = ?
-                WHERE stationary_id = ?
-                """, (spc_energy, zpv_energy, tot_energy, stationary_id))
-
-        else:
-            spc_energy, zpv_energy, tot_energy = _parse_energies(amchi)
-                
-            cursor.execute("""
-            INSERT INTO energies (stationary_id, single_point, zero_point, total_energy)
-            VALUES (?, ?, ?, ?)
-            """, (stationary_id, spc_energy, zpv_energy, tot_energy))
-
-    cursor.execute("SELECT id, amchi FROM transition")
-    transition_rows = cursor.fetchall()
+    # Prefetch logged energies once instead of probing per row
+    cursor.execute(_SQL_STATIONARY_ENERGIES)
+    stationary_energies = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    cursor.execute(_SQL_TRANSITION_ENERGIES)
+    transition_energies = {row[0]: row[1:] for row in cursor.fetchall()}
 
+    cursor.execute(_SQL_STATIONARY_ROWS)
+    stationary_todo = [
+        (stationary_id, amchi)
+        for stationary_id, amchi in cursor.fetchall()
+        if _energies_missing(stationary_energies.get(stationary_id))
+    ]
+
+    cursor.execute(_SQL_TRANSITION_ROWS)
+    transition_rows = cursor.fetchall()
+    transition_todo = []
     for transition_id, amchi in transition_rows:
-        cursor.execute("""
-        SELECT single_point, zero_point, total_energy, imaginary_frequency
-        FROM energies
-        WHERE transition_id = ?
-        """, (transition_id,))
-
-        row = cursor.fetchone()
-        if row is not None:
-            spc_energy, zpv_energy, tot_energy, imaginary_frequency = row
-
-            if spc_energy is None or zpv_energy is None or tot_energy is None:
-                spc_energy, zpv_energy, tot_energy = _parse_energies(amchi)
-
-                cursor.execute("""
-                UPDATE energies
-                SET single_point = ?, zero_point = ?, total_energy = ?
-                WHERE transition_id = ?
-                """, (spc_energy, zpv_energy, tot_energy, transition_id))
-
-            if imaginary_frequency is None:
-                imag_line = _parse_imaginary(amchi).strip()
-                imag_freq = imag_line.split(" ")[3]
-                cursor.execute("""
-                UPDATE energies
-                SET imaginary_frequency = ?
-                WHERE transition_id = ?
-                """, (imag_freq, transition_id))
-
-        else:
-            spc_energy, zpv_energy, tot_energy = _parse_energies(amchi)
-            imag_line = _parse_imaginary(amchi).strip()
-            imag_freq = imag_line.split(" ")[3]
-                
-            cursor.execute("""
-            INSERT INTO energies (transition_id, single_point, zero_point, total_energy, imaginary_frequency)
-            VALUES (?, ?, ?, ?, ?)
-            """, (transition_id, spc_energy, zpv_energy, tot_energy, imag_freq))
-
-        connection.commit()
-
-            
\ No newline at end of file
+        row = transition_energies.get(transition_id)
+        energies = _energies_missing(row)
+        imaginary = row is None or row[3] is None
+
+        if energies or imaginary:
+            transition_todo.append((transition_id, amchi, energies, imaginary))
+
+    # Log parsing is file I/O, so overlap it in threads before taking the write lock
+    with ThreadPoolExecutor() as pool:
+        stationary_results = list(pool.map(_parse_logs, [a for _, a in stationary_todo]))
+        transition_results = list(pool.map(lambda todo: _parse_logs(*todo[1:]), transition_todo))
+
+    stationary_upserts = []
+    for (stationary_id, _), (parsed_energies, _) in zip(stationary_todo, stationary_results):
+        stationary_upserts.append((stationary_id, *parsed_energies))
+
+    transition_upserts = []
+    for todo, (parsed_energies, imag_freq) in zip(transition_todo, transition_results):
+        transition_id = todo[0]
+        transition_upserts.append((transition_id, *parsed_energies, imag_freq))
+
+    # Freshly parsed values win, but a value that failed to parse never clears a logged one
+    with transaction(connection) as cursor:
+        cursor.executemany(_SQL_UPSERT_STATIONARY_ENERGIES, stationary_upserts)
+        cursor.executemany(_SQL_UPSERT_TRANSITION_ENERGIES, transition_upserts)
+
+    # Bound WAL growth now that the batch of energies has been committed
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")